@@ -0,0 +1,25 @@
+"""Converted subscription state to jsonb.
+
+Revision ID: 3b8e1f0c7d24
+Revises: a25551a6b096
+Create Date: 2026-10-15 14:12:37.402115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e1f0c7d24'
+down_revision = 'a25551a6b096'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column('subscription', 'state', type_=postgresql.JSONB(), postgresql_using='state::jsonb')
+
+
+def downgrade():
+    op.alter_column('subscription', 'state', type_=sa.Text(), postgresql_using='state::text')
@@ -14,6 +14,15 @@ class GenericEncoder(json.JSONEncoder):
         
         return super().default(o)
 
+def _wrap_dicts(cls, o):
+    if isinstance(o, dict):
+        return cls((k, _wrap_dicts(cls, v)) for k, v in o.items())
+    
+    elif isinstance(o, list):
+        return [_wrap_dicts(cls, v) for v in o]
+    
+    return o
+
 class Dynamic(dict):
     def __getattr__(self, name: str) -> Any:
         if name in self:
@@ -48,6 +57,13 @@ class Dynamic(dict):
         
         return cur
     
+    def diff(self, other: dict) -> 'Dynamic':
+        """
+        Returns the top level keys whose values are missing or different in other.
+        """
+        
+        return self.__class__((k, v) for k, v in self.items() if k not in other or other[k] != v)
+    
     def to_json(self) -> str:
         return json.dumps(self, separators=(',', ':'), cls=GenericEncoder)
     
@@ -69,6 +85,13 @@ class Dynamic(dict):
         
         return json.loads(json_string, object_hook=cls)
     
+    @classmethod
+    def from_dict(cls, d: dict | None) -> Any:
+        if d is None:
+            return cls()
+        
+        return _wrap_dicts(cls, d)
+    
     @classmethod
     def from_file(cls, filename: str | os.PathLike) -> Any:
         with open(filename) as json_file:
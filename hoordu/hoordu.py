@@ -36,7 +36,17 @@ class hoordu:
         if useragent is not None:
             self.useragent = useragent
         
-        self.engine = create_async_engine(self.settings.database, echo=self.settings.get('debug', False))
+        self.engine = create_async_engine(
+            self.settings.database,
+            echo=self.settings.get('debug', False),
+            pool_size=self.settings.get('pool_size', 10),
+            max_overflow=self.settings.get('pool_overflow', 20),
+            pool_timeout=30,
+            pool_recycle=1800,
+            pool_pre_ping=True,
+            # reuse the most recent connections so the extra ones can time out
+            pool_use_lifo=True,
+        )
         self._sessionmaker = sessionmaker(
             self.engine, expire_on_commit=False, class_=AsyncSession
         )
@@ -45,12 +55,12 @@ class hoordu:
         configure_logger('hoordu', self.settings.get('log_file'))
         self.log: logging.Logger = logging.getLogger('hoordu.hoordu')
         
-        self._session: HoorduSession = HoorduSession(self)
-        
         self._plugins: dict[str, Type[PluginBase]] = dict()
         
-        self.filespath: str = '{}/files'.format(self.settings.base_path)
-        self.thumbspath: str = '{}/thumbs'.format(self.settings.base_path)
+        self.filespath: str = f'{self.settings.base_path}/files'
+        self.thumbspath: str = f'{self.settings.base_path}/thumbs'
+        self._bucket_size: int = int(self.settings.files_bucket_size)
+        self._known_buckets: set[int] = set()
         
         self._plugins[Filesystem.id] = Filesystem
         
@@ -69,20 +79,16 @@ class hoordu:
             await conn.run_sync(models.Base.metadata.create_all)
     
     def _file_bucket(self, file: File) -> int:
-        return file.id // self.settings.files_bucket_size
+        return file.id // self._bucket_size
     
     def get_file_paths(self, file: File) -> tuple[str, str]:
         file_bucket = self._file_bucket(file)
         
-        if file.ext:
-            filepath = '{}/{}/{}.{}'.format(self.filespath, file_bucket, file.id, file.ext)
-        else:
-            filepath = '{}/{}/{}'.format(self.filespath, file_bucket, file.id)
+        ext = f'.{file.ext}' if file.ext else ''
+        thumb_ext = f'.{file.thumb_ext}' if file.thumb_ext else ''
         
-        if file.thumb_ext:
-            thumbpath = '{}/{}/{}.{}'.format(self.thumbspath, file_bucket, file.id, file.thumb_ext)
-        else:
-            thumbpath = '{}/{}/{}'.format(self.thumbspath, file_bucket, file.id)
+        filepath = f'{self.filespath}/{file_bucket}/{file.id}{ext}'
+        thumbpath = f'{self.thumbspath}/{file_bucket}/{file.id}{thumb_ext}'
         
         return filepath, thumbpath
     
@@ -90,7 +96,7 @@ class hoordu:
         plugin_class: Type[PluginBase],
         parameters: Optional[Dynamic] = None
     ) -> tuple[bool, Form | None]:
-        async with self._session as session:
+        async with self.session() as session:
             # create source
             source = await session.select(Source) \
                     .where(Source.name == plugin_class.source) \
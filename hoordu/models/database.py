@@ -1,16 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum, IntFlag, auto
 import json
 from typing import Any, Optional
 
-from sqlalchemy import Table, Column, Integer, String, Text, LargeBinary, DateTime, Numeric, ForeignKey, Index, func, inspect, select, insert
+from sqlalchemy import Table, Column, Integer, String, Text, LargeBinary, DateTime, Numeric, ForeignKey, Index, func, inspect, select, insert, update, literal, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, ColumnProperty, RelationshipProperty, DeclarativeBase, Mapped, mapped_column
-from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.attributes import InstrumentedAttribute, set_committed_value
 from sqlalchemy.ext.asyncio import async_object_session, AsyncAttrs
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy_fulltext import FullText
 from sqlalchemy_utils import ChoiceType
 
+from ..dynamic import Dynamic
 from .common import *
 
 __all__ = [
@@ -383,7 +385,7 @@ class Subscription(Base):
     name: Mapped[str] = mapped_column(Text, nullable=False)
     
     options: Mapped[Optional[str]] = mapped_column(Text)
-    state: Mapped[Optional[str]] = mapped_column(Text)
+    state: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB)
     metadata_: Mapped[Optional[str]] = mapped_column('metadata', Text)
     
     flags: Mapped[SubscriptionFlags] = mapped_column(Integer, default=SubscriptionFlags.none, nullable=False)
@@ -439,6 +441,35 @@ class Subscription(Base):
                 ))
         
         return True
+    
+    async def update_state(self, patch: dict[str, Any]) -> None:
+        """
+        Merges the top level keys of `patch` into the state,
+        on the database side so the rest of the state isn't sent back.
+        """
+        
+        session = async_object_session(self)
+        if session is None:
+            raise ValueError('SQLAlchemy session could not be found')
+        
+        # bind the patch as text, a JSONB bind would encode the string again
+        patch_value = literal(Dynamic(patch).to_json(), Text).cast(JSONB)
+        state = func.coalesce(Subscription.state, text("'{}'::jsonb"))
+        
+        result = await session.execute(update(Subscription) \
+                .where(Subscription.id == self.id)
+                .values(
+                    state=state.op('||')(patch_value),
+                    updated_time=datetime.now(timezone.utc)
+                )
+                .returning(Subscription.state, Subscription.updated_time)
+                .execution_options(synchronize_session=False))
+        
+        # the merged value can't be evaluated in python, so load it from the result
+        # without marking the attributes as modified
+        state, updated_time = result.one()
+        set_committed_value(self, 'state', state)
+        set_committed_value(self, 'updated_time', updated_time)
 
 class TagTranslation(Base):
     __tablename__ = 'tag_translation'
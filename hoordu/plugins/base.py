@@ -1,24 +1,18 @@
 import abc
-from enum import Enum
-from typing import Any, Optional, ClassVar, Protocol, Type, TypeVar, Generic, Union
-from collections.abc import AsyncGenerator, AsyncIterable, Iterable
+from typing import Any, Optional, ClassVar, Union, TYPE_CHECKING
+from collections.abc import AsyncGenerator
 
 from dataclasses import dataclass, field
-from sqlalchemy import select
 
 from ..dynamic import Dynamic
-from ..forms import *
-from ..logging import *
-from ..models import *
-from ..util import *
+from ..forms import Form
+from ..models.common import TagCategory, PostType
 
 from datetime import datetime
-import pathlib
 import logging
-import os
-import contextlib
-import yarl
-import aiohttp
+
+if TYPE_CHECKING:
+    import aiohttp
 
 
 __all__ = [
@@ -41,7 +35,7 @@ class RateLimitError(APIError):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class FileDetails:
     url: str
     order: Optional[int] = None
@@ -50,14 +44,14 @@ class FileDetails:
     metadata: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TagDetails:
     category: TagCategory
     tag: str
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class PostDetails:
     type: Optional[PostType] = None
     url: Optional[str] = None
@@ -78,14 +72,20 @@ class PostDetails:
     _omit_id: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchDetails:
     identifier: str
     hint: Optional[str] = None
     title: Optional[str] = None
     description: Optional[str] = None
     thumbnail_url: Optional[str] = None
-    related_urls: Optional[list[str]] = field(default_factory=list)
+    related_urls: tuple[str, ...] = ()
+    
+    def __post_init__(self):
+        # drop duplicates but keep the order chosen by the plugin
+        # tuples are immutable, so they can be kept as they are
+        if not isinstance(self.related_urls, tuple):
+            self.related_urls = tuple(dict.fromkeys(self.related_urls or ()))
     
     def to_json(self):
         d = Dynamic({
@@ -97,12 +97,15 @@ class SearchDetails:
 
 
 class PluginBase:
+    # subclasses without their own __slots__ still get a __dict__
+    __slots__ = ('log', 'config', 'http')
+    
     # reserved
     id: ClassVar[str]
     log: logging.Logger
     config: Any
     
-    http: aiohttp.ClientSession
+    http: 'aiohttp.ClientSession'
     
     # to be set by plugin developer
     source: ClassVar[str]
@@ -17,6 +17,7 @@ from .base import *
 from datetime import datetime, timezone
 import pathlib
 import logging
+import asyncio
 import os
 import contextlib
 import yarl
@@ -28,6 +29,11 @@ __all__ = [
 
 
 class PluginWrapper:
+    __slots__ = (
+        'session', 'plugin_class', 'log', 'source', 'plugin', 'config',
+        'instance', 'http', '_download_limit', '__context'
+    )
+    
     def __init__(self,
         session,
         plugin_class: Type[PluginBase]
@@ -40,6 +46,8 @@ class PluginWrapper:
         self.plugin: Plugin
         self.instance: PluginBase
         self.http: aiohttp.ClientSession
+        
+        self._download_limit: asyncio.Semaphore = asyncio.Semaphore(session.hoordu.settings.get('download_workers', 8))
     
     async def get_source(self, session) -> Source:
         stream = await session.stream(
@@ -79,19 +87,35 @@ class PluginWrapper:
             
             return False, post
     
-    async def _get_tag(self, category: TagCategory, tagstr: str) -> RemoteTag:
-        tag = await self.session.select(RemoteTag) \
+    async def _get_tags(self, tag_details: list[TagDetails]) -> list[RemoteTag]:
+        """
+        Looks up all tags of a post with a single query,
+        and creates the ones that don't exist yet.
+        """
+        
+        if not tag_details:
+            return []
+        
+        existing = await self.session.select(RemoteTag) \
                 .where(
                     RemoteTag.source == self.source,
-                    RemoteTag.category == category,
-                    RemoteTag.tag == tagstr
-                ).one_or_none()
+                    RemoteTag.tag.in_({t.tag for t in tag_details})
+                ).all()
+        
+        tags = {(tag.category, tag.tag): tag for tag in existing}
+        
+        new_tags = []
+        for details in tag_details:
+            key = (details.category, details.tag)
+            if key not in tags:
+                tag = RemoteTag(source=self.source, category=details.category, tag=details.tag)
+                tags[key] = tag
+                new_tags.append(tag)
         
-        if tag is None:
-            tag = RemoteTag(source=self.source, category=category, tag=tagstr)
-            self.session.add(tag)
+        if new_tags:
+            self.session.add(*new_tags)
         
-        return tag
+        return [tags[(t.category, t.tag)] for t in tag_details]
     
     async def __aenter__(self):
          self.__context = self.context()
@@ -122,6 +146,37 @@ class PluginWrapper:
             await self.instance.init()
             yield self
     
+    async def _fetch_file(self,
+        file: File,
+        file_details: FileDetails
+    ) -> tuple[str, bool]:
+        """
+        Returns a local path with the contents of the file,
+        and whether that path is a temporary file that can be moved.
+        """
+        
+        self.log.info(f'found new file {file.remote_order}: {file.remote_identifier}')
+        url = yarl.URL(file_details.url)
+        match url.scheme:
+            case 'file':
+                orig = file_details.url[len('file://'):]
+                self.log.debug(f'copying file: {orig}')
+                return orig, False
+            
+            case 'http' | 'https':
+                async with self._download_limit:
+                    self.log.debug(f'downloading file: {url}')
+                    async with self.http.get(file_details.url) as resp:
+                        orig = await save_response(resp, suffix=file_details.filename)
+                return orig, True
+            
+            case 'data':
+                return save_data_uri(file_details.url), True
+            
+            case _:
+                self.log.warning(f'unknown scheme: {url.scheme}')
+                raise Exception(f'unable to download file url: {url}')
+    
     async def _convert_post(self,
         remote_post: RemotePost,
         post_details: PostDetails
@@ -147,8 +202,8 @@ class PluginWrapper:
         for name, value in post_details.metadata.items():
             remote_post.update_metadata(name, value)
         
-        for tag_details in post_details.tags:
-            tag = await self._get_tag(tag_details.category, tag_details.tag)
+        tags = await self._get_tags(post_details.tags)
+        for tag, tag_details in zip(tags, post_details.tags):
             for name, value in tag_details.metadata.items():
                 if tag.update_metadata(name, value):
                     self.session.add(tag)
@@ -159,6 +214,8 @@ class PluginWrapper:
         by_order = {file.remote_order: file for file in post_files}
         by_identifier = {file.remote_identifier: file for file in post_files}
         
+        files: list[tuple[File, FileDetails]] = []
+        new_files: list[File] = []
         for i, file_details in enumerate(post_details.files):
             order = file_details.order if file_details.order is not None else i
             if file_details.identifier is not None:
@@ -175,41 +232,38 @@ class PluginWrapper:
                     remote_identifier=file_details.identifier,
                     metadata_=file_details.metadata
                 )
-                self.session.add(file)
-                await self.session.commit()
+                new_files.append(file)
             
             file.filename = file_details.filename
-            
-            if not file.present:
-                orig = None
-                is_move = False
-                
-                self.log.info(f'found new file {file.remote_order}: {file.remote_identifier}')
-                url = yarl.URL(file_details.url)
-                match url.scheme:
-                    case 'file':
-                        print(file_details.url)
-                        orig = file_details.url[len('file://'):]
-                        self.log.debug(f'copying file: {orig}')
-                        is_move = False
-                    
-                    case 'http' | 'https':
-                        self.log.debug(f'downloading file: {url}')
-                        async with self.http.get(file_details.url) as resp:
-                            orig = await save_response(resp, suffix=file_details.filename)
-                        is_move = True
-                    
-                    case 'data':
-                        path = save_data_uri(file_details.url)
-                        is_move = True
-                    
-                    case _:
-                        self.log.warning(f'unknown scheme: {url.scheme}')
-                        raise Exception(f'unable to download file url: {url}')
-                
-                if orig is not None:
-                    await self.session.import_file(file, orig, move=is_move)
-                    await self.session.commit()
+            files.append((file, file_details))
+        
+        # insert all new files at once, they need an id before being imported
+        if new_files:
+            self.session.add(*new_files)
+            await self.session.commit()
+        
+        # download all missing files concurrently, but import the ones that
+        # succeeded before raising
+        missing = [(file, file_details) for file, file_details in files if not file.present]
+        results = await asyncio.gather(
+            *(self._fetch_file(file, file_details) for file, file_details in missing),
+            return_exceptions=True
+        )
+        
+        downloaded = []
+        errors = []
+        for (file, file_details), result in zip(missing, results):
+            if isinstance(result, BaseException):
+                self.log.error(f'failed to download file: {file_details.url}', exc_info=result)
+                errors.append(result)
+            else:
+                downloaded.append((file, *result))
+        
+        if downloaded:
+            await self.session.import_files(downloaded)
+        
+        if errors:
+            raise errors[0]
         
         existing_related = await remote_post.awaitable_attrs.related
         for url in post_details.related:
@@ -298,7 +352,7 @@ class PluginWrapper:
         end_at = None
         custom_state: dict[str, Any] = {}
         if subscription is not None:
-            state = Dynamic.from_json(subscription.state)
+            state = Dynamic.from_dict(subscription.state)
             if not is_head:
                 begin_at = state.get('tail_id')
                 if isinstance(begin_at, str): begin_at = int(begin_at)
@@ -352,19 +406,26 @@ class PluginWrapper:
             
         finally:
             if subscription is not None:
-                state = Dynamic.from_json(subscription.state)
+                state = Dynamic.from_dict(subscription.state)
+                new_state = Dynamic(state)
                 
                 if first_id is not None and (not state.contains('head_id') or (is_head and not exc)):
-                    state.head_id = first_id
+                    new_state.head_id = first_id
                     
                 if last_id is not None and (not state.contains('tail_id') or not is_head):
-                    state.tail_id = last_id
+                    new_state.tail_id = last_id
                 
-                state.custom = custom_state
+                new_state.custom = custom_state
                 
-                subscription.state = state.to_json()
-                subscription.updated_time = datetime.now(timezone.utc)
-                self.session.add(subscription)
+                # only send the keys that actually changed
+                patch = new_state.diff(state)
+                if patch:
+                    await subscription.update_state(patch)
+                    
+                else:
+                    # still mark the subscription as checked, the cli schedules by updated_time
+                    subscription.updated_time = datetime.now(timezone.utc)
+                    self.session.add(subscription)
             
             await self.session.commit()
     
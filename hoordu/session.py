@@ -1,8 +1,8 @@
-from collections.abc import Callable, Awaitable
+from collections.abc import Callable, Awaitable, Iterable
 from typing import Coroutine, Type
+import asyncio
 import contextlib
 import pathlib
-import shutil
 import os
 from typing import Optional
 import logging
@@ -17,6 +17,21 @@ from .plugins import *
 from .plugins.wrapper import PluginWrapper
 from .thumbnailers import generate_thumbnail
 
+# extensions common enough in scraped media to skip libmagic
+_EXT_MIME = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+    'mp4': 'video/mp4',
+    'webm': 'video/webm',
+    'mov': 'video/quicktime',
+    'mp3': 'audio/mpeg',
+    'zip': 'application/zip',
+    'pdf': 'application/pdf',
+}
 
 class HoorduSession:
     def __init__(self, hoordu):
@@ -49,6 +64,8 @@ class HoorduSession:
         finally:
             await self._stack.__aexit__(exc_type, exc, tb)
             self._stack = contextlib.AsyncExitStack()
+            # the wrappers were closed with the stack, don't hand them out again
+            self._plugins.clear()
         
         return False
     
@@ -137,31 +154,38 @@ class HoorduSession:
         return SqlStatement(self.raw, select(*args, **kwargs))
     
     
-    async def import_file(self,
+    async def _store_file(self,
         file: File,
         path: str,
         move: bool = False
     ) -> None:
-        mvfun: Callable[[str, str], Awaitable[None]] = wrap_async(shutil.move if move else shutil.copy)
+        mvfun: Callable[[str, str], Awaitable[None]] = move_file if move else copy_file
+        
+        file.ext = os.path.splitext(path)[1][1:20] or None
         
-        file.hash = await md5(path)
-        file.mime = await mime_from_file(path)
-        suffixes = pathlib.Path(path).suffixes
-        if len(suffixes):
-            file.ext = suffixes[-1][1:20]
+        mime = _EXT_MIME.get(file.ext.lower()) if file.ext else None
+        if mime is not None:
+            file.hash = await md5(path)
+            file.mime = mime
+            
         else:
-            file.ext = None
+            file.hash, file.mime = await md5_mime(path)
         
         file.thumb_ext = 'jpg'
         
         dst, tdst = self.hoordu.get_file_paths(file)
         
-        await mkpath(pathlib.Path(dst).parent)
+        # only create the bucket directories the first time they're used
+        bucket = self.hoordu._file_bucket(file)
+        if bucket not in self.hoordu._known_buckets:
+            await mkpath(os.path.dirname(dst))
+            await mkpath(os.path.dirname(tdst))
+            self.hoordu._known_buckets.add(bucket)
+        
         await mvfun(path, dst)
         os.chmod(dst, self.hoordu.config.settings.perms)
         file.present = True
         
-        await mkpath(pathlib.Path(tdst).parent)
         has_thumbnail = False
         try:
             has_thumbnail = await generate_thumbnail(dst, tdst, file.mime)
@@ -176,6 +200,46 @@ class HoorduSession:
             
         else:
             file.thumb_ext = None
+    
+    async def import_file(self,
+        file: File,
+        path: str,
+        move: bool = False
+    ) -> None:
+        await self._store_file(file, path, move)
         
         self.add(file)
         await self.commit()
+    
+    async def import_files(self,
+        files: Iterable[tuple[File, str, bool]]
+    ) -> None:
+        """
+        Imports several (file, path, move) entries at once.
+        The disk work and thumbnail generation of all files runs concurrently,
+        and the database is only committed once at the end.
+        If any file fails, the others are still committed before the first error is raised,
+        and the remaining errors are logged.
+        """
+        
+        files = list(files)
+        limit = asyncio.Semaphore(os.cpu_count() or 4)
+        
+        async def store(file, path, move):
+            async with limit:
+                await self._store_file(file, path, move)
+        
+        results = await asyncio.gather(*(store(*entry) for entry in files), return_exceptions=True)
+        
+        # commit the files that were stored before raising
+        stored = [file for (file, _, _), result in zip(files, results) if not isinstance(result, BaseException)]
+        if stored:
+            self.add(*stored)
+            await self.commit()
+        
+        errors = [result for result in results if isinstance(result, BaseException)]
+        for error in errors[1:]:
+            self.log.error('failed to import file', exc_info=error)
+        
+        if errors:
+            raise errors[0]
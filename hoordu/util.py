@@ -2,15 +2,19 @@ __all__ = [
     'wrap_async',
     'mime_from_file',
     'md5',
+    'md5_mime',
     'mkpath',
+    'copy_file',
+    'move_file',
     'template_format',
     'save_data_uri'
 ]
 
 import os
+import errno
+import shutil
 import asyncio
 import functools
-import pathlib
 from collections.abc import Awaitable, Callable
 from hashlib import md5 as _md5
 from string import Template
@@ -27,19 +31,94 @@ if hasattr(magic, 'open'):
     __magic = magic.open(magic.MAGIC_MIME_TYPE)
     __magic.load()
     mime_from_file_sync = __magic.file
+    mime_from_buffer_sync = __magic.buffer
 else:
     mime_from_file_sync = lambda path: magic.from_file(path, mime=True)
+    mime_from_buffer_sync = lambda buffer: magic.from_buffer(buffer, mime=True)
 # /
 
+# libmagic only looks at the start of the file, so the first chunk is enough
+READ_CHUNK_SIZE = 1 << 20
+
 def md5_sync(filename: str | bytes | os.PathLike) -> bytes:
     digest = _md5()
     with open(filename, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b''):
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
             digest.update(chunk)
     return digest.digest()
 
+def md5_mime_sync(filename: str | bytes | os.PathLike) -> tuple[bytes, str]:
+    """
+    Computes the md5 digest and detects the mime type of a file in a single pass.
+    """
+    
+    digest = _md5()
+    buffer = bytearray(READ_CHUNK_SIZE)
+    view = memoryview(buffer)
+    mime = None
+    
+    with open(filename, 'rb', buffering=0) as f:
+        while (size := f.readinto(buffer)):
+            chunk = view[:size]
+            if mime is None:
+                mime = mime_from_buffer_sync(bytes(chunk))
+            
+            digest.update(chunk)
+    
+    # empty file, libmagic reports these differently for paths and buffers
+    if mime is None:
+        mime = mime_from_file_sync(filename)
+    
+    return digest.digest(), mime
+
+# errors that mean the syscall can't be used for this pair of files
+_COPY_FALLBACK_ERRNOS = (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP)
+
+def copy_file_sync(src: str | os.PathLike, dst: str | os.PathLike) -> None:
+    """
+    Copies the contents of src to dst, keeping the data in the kernel when possible.
+    Tries copy_file_range first (reflinks on CoW filesystems), then sendfile,
+    and finally falls back to a regular userspace copy.
+    """
+    
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while os.copy_file_range(in_fd, out_fd, READ_CHUNK_SIZE):
+                    pass
+                return
+                
+            except OSError as e:
+                if e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+        
+        if hasattr(os, 'sendfile'):
+            try:
+                while os.sendfile(out_fd, in_fd, None, READ_CHUNK_SIZE):
+                    pass
+                return
+                
+            except OSError as e:
+                if e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+        
+        shutil.copyfileobj(fsrc, fdst, READ_CHUNK_SIZE)
+
+def move_file_sync(src: str | os.PathLike, dst: str | os.PathLike) -> None:
+    try:
+        os.rename(src, dst)
+        
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        
+        copy_file_sync(src, dst)
+        os.unlink(src)
+
 def mkpath_sync(path: str | bytes | os.PathLike) -> None:
-    pathlib.Path(path).mkdir(parents=True, exist_ok=True)
+    os.makedirs(path, exist_ok=True)
 
 
 P = ParamSpec('P')
@@ -55,7 +134,10 @@ def wrap_async(func: Callable[P, R]) -> Callable[P, Awaitable[R]]:
 
 mime_from_file = wrap_async(mime_from_file_sync)
 md5 = wrap_async(md5_sync)
+md5_mime = wrap_async(md5_mime_sync)
 mkpath = wrap_async(mkpath_sync)
+copy_file = wrap_async(copy_file_sync)
+move_file = wrap_async(move_file_sync)
 
 
 def template_format(format: str, **kwargs: Any):